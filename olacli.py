@@ -1,20 +1,48 @@
 #!/usr/bin/env python3
 import os
+import sys
 import requests
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
 import subprocess
 import json
 import re
 import argparse
 import base64
+import hashlib
+import codecs
 import time
-from typing import List, Dict, Optional
+import threading
+import atexit
+from collections import deque
+from typing import List, Dict, Optional, Iterator
 
-# NEW: Import BeautifulSoup for parsing HTML
+# NEW: Import lxml for parsing HTML; BeautifulSoup is the (slower) fallback
 try:
-    from bs4 import BeautifulSoup
+    from lxml import html as lxml_html, etree as lxml_etree
 except ImportError:
-    print("Fehler: Das 'BeautifulSoup' Modul wird benötigt. Bitte installieren: pip install beautifulsoup4")
-    exit(1)
+    lxml_html = None
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        print("Fehler: Das 'lxml' oder 'BeautifulSoup' Modul wird benötigt. Bitte installieren: pip install lxml")
+        exit(1)
+
+# Faster JSON for the streaming hot path; stdlib json is the fallback
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    orjson = None
+    def _json_loads(data) -> object: return json.loads(bytes(data)) # Also accepts memoryview, like orjson
+    def _json_dumps(obj) -> bytes: return json.dumps(obj).encode('utf-8')
+
+# prompt_toolkit gives the nicest input line; readline is the fallback
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import FileHistory
+except ImportError:
+    PromptSession = None
 
 try:
     import readline
@@ -22,67 +50,263 @@ except ImportError:
     try:
         import pyreadline3 as readline
     except ImportError:
-        print("Hinweis: Für eine bessere Eingabe mit Befehlshistorie, installieren Sie 'pyreadline3' (pip install pyreadline3)")
+        if not PromptSession: print("Hinweis: Für eine bessere Eingabe mit Befehlshistorie, installieren Sie 'pyreadline3' (pip install pyreadline3)")
         readline = None
 
+# Pre-compiled patterns used on every AI response
+_FILENAME_RE = re.compile(r"filename: (.*?)\n")
+_TOOL_WEB_RE = re.compile(r'\[TOOL_WEB\]\s*(https?://[^\s\]]+)')
+_FNAME_SUGGEST_RE = re.compile(r'([\w_./-]+\.\w+)')
+_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+_BLANK_LINE_RE = re.compile(rb'\s*') # Empty or keep-alive lines in the Ollama stream
+
+# Reused HTTP sessions so repeated calls keep their connections alive
+_SESSION = requests.Session()
+_WEB_SESSION = requests.Session()
+_WEB_SESSION.headers.update({ # Act like a real browser
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+
+# File extensions for common languages; these get a hash-based filename without a model call
+_EXT = {
+    "python": "py", "py": "py", "bash": "sh", "sh": "sh", "javascript": "js", "js": "js",
+    "go": "go", "rust": "rs", "c": "c", "cpp": "cpp", "c++": "cpp", "java": "java",
+    "html": "html", "css": "css", "sql": "sql",
+}
+
+# Directories already created for saved code, so repeated saves skip os.makedirs
+_MKDIR_CACHE: set = set()
+
 # --- Most functions are the same, new function is added below ---
 
-def call_ollama_api_stream(messages: List[Dict], model: str, max_retries: int = 3, verbose: bool = True) -> str:
-    # (Identical to previous version)
-    data = { "model": model, "messages": messages, "stream": True }
-    url = "http://localhost:11434/api/chat"
+# Token context returned by /api/generate for the main conversation, so each
+# turn only has to send the new messages instead of the whole history
+_last_context: Optional[List[int]] = None
+
+# Rolling window for the conversation: the system message is always kept. Once
+# either limit is exceeded, the oldest other messages are dropped until the window
+# is down to half of both limits, so the token context only has to be rebuilt every
+# ~10 turns rather than on every turn. Messages after the last assistant reply
+# haven't reached the model yet and are never dropped.
+_MAX_HISTORY_MSGS = 40
+_MAX_HISTORY_TOKENS = 8000
+
+def _trim_history(messages: List[Dict]):
+    global _last_context
+    first = 1 if messages and messages[0]["role"] == "system" else 0
+    tokens = sum(len(m["content"]) // 4 for m in messages[first:]) # Rough estimate
+    if len(messages) <= _MAX_HISTORY_MSGS and tokens <= _MAX_HISTORY_TOKENS: return
+    unsent = len(messages)
+    while unsent > first and messages[unsent - 1]["role"] != "assistant": unsent -= 1
+    drop = first
+    while drop < unsent and (len(messages) - (drop - first) > _MAX_HISTORY_MSGS // 2 or tokens > _MAX_HISTORY_TOKENS // 2):
+        tokens -= len(messages[drop]["content"]) // 4
+        drop += 1
+    if drop > first:
+        del messages[first:drop]
+        # The token context still holds the dropped turns; start over from the trimmed window
+        _last_context = None
+
+# Chat history is stored as one JSON message per line, so saving only appends
+# the newest message and loading only has to parse the last few lines
+CHAT_HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".olacli_chat_history.ndjson")
+_history_file = None # Opened for appending when --save-history is given
+
+def _append_history(msg: Dict):
+    if _history_file:
+        _history_file.write(_json_dumps(msg) + b'\n'); _history_file.flush()
+
+def load_history(path: str, max_messages: int) -> List[Dict]:
+    """Returns the last max_messages messages of a saved chat history."""
+    try:
+        with open(path, "rb") as f: lines = deque(f, maxlen=max_messages)
+    except FileNotFoundError:
+        return []
+    history = []
+    for line in lines:
+        try: history.append(_json_loads(line))
+        except ValueError: pass # Skip a line cut short by an interrupted write
+    return history
+
+def add_message(messages: List[Dict], role: str, content: str):
+    """Appends a message to the conversation and keeps it within the rolling window."""
+    msg = {"role": role, "content": content}
+    messages.append(msg)
+    _append_history(msg)
+    _trim_history(messages)
+
+def _pending_prompt(messages: List[Dict]) -> str:
+    """Builds the prompt for the messages not yet covered by _last_context."""
+    if _last_context is None:
+        pending = [m for m in messages if m["role"] != "system"]
+    else:
+        # Everything up to the last assistant reply is already in the context
+        start = len(messages)
+        while start > 0 and messages[start - 1]["role"] == "user": start -= 1
+        pending = messages[start:]
+    if all(m["role"] == "user" for m in pending):
+        return "\n\n".join(m["content"] for m in pending)
+    return "\n\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in pending)
+
+def _iter_stream_json(response) -> Iterator[Dict]:
+    """
+    Parses the raw NDJSON stream, reading 64 KB at a time into one reused buffer.
+    Lines are handed to the JSON parser as memoryview slices, so they are never copied.
+    """
+    buf = bytearray()
+    try:
+        for chunk in response.raw.stream(65536, decode_content=True):
+            buf += chunk
+            start = 0
+            with memoryview(buf) as view:
+                while (nl := buf.find(b'\n', start)) >= 0:
+                    end = nl - 1 if nl > start and buf[nl - 1] == 0x0d else nl # Drop the \r of CRLF
+                    if not _BLANK_LINE_RE.fullmatch(buf, start, end): yield _json_loads(view[start:end])
+                    start = nl + 1
+            del buf[:start]
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    if buf.strip(): yield _json_loads(buf)
+
+def call_ollama_api_stream(messages: List[Dict], model: str, max_retries: int = 3, verbose: bool = True, use_context: bool = False) -> str:
+    """
+    Streams a reply from Ollama. With use_context, the main conversation is sent via
+    /api/generate as only the new messages plus the token context of the previous turn.
+    """
+    global _last_context
+    if use_context:
+        payload = { "model": model, "prompt": _pending_prompt(messages), "stream": True }
+        if _last_context is None:
+            if messages and messages[0]["role"] == "system": payload["system"] = messages[0]["content"]
+        else:
+            payload["context"] = _last_context
+        url = "http://localhost:11434/api/generate"
+    else:
+        payload = { "model": model, "messages": messages, "stream": True }
+        url = "http://localhost:11434/api/chat"
+    data = _json_dumps(payload)
+    headers = {"Content-Type": "application/json"}
     for attempt in range(max_retries):
         try:
-            with requests.post(url, json=data, stream=True, timeout=60) as response:
+            with _SESSION.post(url, data=data, headers=headers, stream=True, timeout=60) as response:
                 response.raise_for_status()
-                full_response = ""
-                for chunk in response.iter_lines():
-                    if chunk:
-                        decoded_chunk = chunk.decode('utf-8')
-                        json_chunk = json.loads(decoded_chunk)
+                parts = []
+                pending = 0 # Tokens written since the last flush
+                new_context = None
+                for json_chunk in _iter_stream_json(response):
+                    if use_context:
+                        content = json_chunk.get("response", "")
+                        if json_chunk.get("done"): new_context = json_chunk.get("context")
+                    else:
                         content = json_chunk.get("message", {}).get("content", "")
-                        full_response += content
-                        if verbose:
-                            print(content, end="", flush=True)
-                return full_response
+                    parts.append(content)
+                    if verbose:
+                        sys.stdout.write(content)
+                        pending += 1
+                        if pending >= 16 or '\n' in content:
+                            sys.stdout.flush(); pending = 0
+                if verbose: sys.stdout.flush()
+                if new_context: _last_context = new_context
+                return "".join(parts)
         except requests.exceptions.RequestException as e:
             if verbose: print(f"\nError calling Ollama API: {e}")
             if attempt == max_retries - 1: return None
 
 def extract_code_block(response_text: str) -> tuple:
-    # (Identical to previous version)
-    filename_match = re.search(r"filename: (.*?)\n", response_text)
+    filename_match = _FILENAME_RE.search(response_text)
     filename = filename_match.group(1).strip() if filename_match else None
-    code_match = re.search(r"```(.*?)\n(.*?)```", response_text, re.DOTALL)
-    if code_match:
-        language = code_match.group(1).strip().lower()
-        code = code_match.group(2).strip()
-        return filename, language, code
-    return filename, None, None
+    # Locate the fences with plain substring searches instead of a backtracking regex
+    start = response_text.find('```')
+    if start < 0: return filename, None, None
+    newline = response_text.find('\n', start + 3)
+    if newline < 0: return filename, None, None
+    end = response_text.find('```', newline + 1)
+    if end < 0: return filename, None, None
+    language = response_text[start + 3:newline].strip().lower()
+    code = response_text[newline + 1:end].strip()
+    return filename, language, code
 
 # --- NEW FUNCTION: The Web Tool ---
+def _page_charset(content_type: str) -> Optional[str]:
+    """Returns the charset named in a Content-Type header, if Python knows it."""
+    match = _CHARSET_RE.search(content_type or '')
+    if not match: return None
+    try: return codecs.lookup(match.group(1)).name
+    except LookupError: return None
+
+def _is_utf8(content: bytes) -> bool:
+    # Incremental decoding tolerates a character cut off by the download limit
+    try: codecs.getincrementaldecoder('utf-8')().decode(content, final=False)
+    except UnicodeDecodeError: return False
+    return True
+
+def _html_strings_lxml(content: bytes, charset: Optional[str] = None) -> Iterator[str]:
+    """Yields the stripped text pieces of a page's body, without script/style content."""
+    # lxml alone would read pages without a <meta charset> as Latin-1
+    if not charset and _is_utf8(content): charset = 'utf-8'
+    parser = lxml_html.HTMLParser(encoding=charset) if charset else None
+    try:
+        tree = lxml_html.fromstring(content, parser=parser)
+    except (lxml_etree.ParserError, ValueError):
+        return # Blank, comment-only or declaration-only documents have no elements
+    # Remove script and style elements in one XPath pass (drop_tree keeps the tail text)
+    for bad in tree.xpath('//script | //style | //noscript'):
+        bad.drop_tree()
+    root = tree.find('body')
+    for string in (root if root is not None else tree).itertext():
+        string = string.strip()
+        if string: yield string
+
+def _html_strings_bs4(content: bytes, charset: Optional[str] = None) -> Iterator[str]:
+    """Same as _html_strings_lxml, for when only BeautifulSoup is installed."""
+    soup = BeautifulSoup(content, 'html.parser', from_encoding=charset)
+    for script_or_style in soup(["script", "style", "noscript"]):
+        script_or_style.decompose()
+    yield from (soup.find('body') or soup).stripped_strings
+
+# Recently fetched pages: url -> (fetch time, text). Entries expire so real-time data stays fresh
+_WEB_CACHE: Dict[str, tuple] = {}
+_WEB_CACHE_TTL = 600
+_WEB_CACHE_MAX = 64
+
+def _fetch_url_text(url: str) -> str:
+    """Downloads a URL and returns its clean text."""
+    max_length = 8000 # Limit the text to a reasonable size to not overwhelm the AI
+    max_bytes = 128 * 1024 # Only download and parse the start of large pages
+    buf = bytearray()
+    with _WEB_SESSION.get(url, timeout=15, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=65536):
+            buf += chunk
+            if len(buf) >= max_bytes: break
+        charset = _page_charset(response.headers.get('Content-Type'))
+
+    # Collect text only until we have enough
+    strings = _html_strings_lxml(bytes(buf), charset) if lxml_html else _html_strings_bs4(bytes(buf), charset)
+    parts, total = [], 0
+    for string in strings:
+        parts.append(string)
+        total += len(string) + 1
+        if total >= max_length: break
+    text = '\n'.join(parts)
+    return text[:max_length]
+
 def fetch_url_content(url: str) -> str:
     """Fetches and extracts clean text from a URL."""
     try:
         print(f"\n\n🤖 Accessing web page: {url}...")
-        headers = { # Act like a real browser
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # Use BeautifulSoup to parse HTML and get clean text
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script_or_style in soup(["script", "style"]):
-            script_or_style.decompose()
-        
-        text = soup.get_text(separator='\n', strip=True)
-        # Limit the text to a reasonable size to not overwhelm the AI
-        max_length = 8000
+        cached = _WEB_CACHE.get(url)
+        if cached and time.monotonic() - cached[0] < _WEB_CACHE_TTL:
+            text = cached[1]
+        else:
+            text = _fetch_url_text(url) # Errors raise here, so they are never cached
+            _WEB_CACHE.pop(url, None)
+            _WEB_CACHE[url] = (time.monotonic(), text)
+            if len(_WEB_CACHE) > _WEB_CACHE_MAX: del _WEB_CACHE[next(iter(_WEB_CACHE))] # Oldest entry
         print(f"✅ Web page content fetched and cleaned.")
-        return text[:max_length]
+        return text
 
     except requests.exceptions.RequestException as e:
         print(f"❌ Error fetching URL: {e}")
@@ -93,7 +317,7 @@ def handle_response(ai_response: str, messages: List[Dict], model: str):
     Handles AI responses, now with a web tool, shell commands, and file-saving.
     """
     # --- NEW: Check for the web tool command first ---
-    tool_match = re.search(r'\[TOOL_WEB\]\s*(https?://[^\s\]]+)', ai_response)
+    tool_match = _TOOL_WEB_RE.search(ai_response) if '[TOOL_WEB]' in ai_response else None
     if tool_match:
         url = tool_match.group(1)
         web_content = fetch_url_content(url)
@@ -107,12 +331,12 @@ def handle_response(ai_response: str, messages: List[Dict], model: str):
         )
         
         # Add this context to the messages history
-        messages.append({"role": "user", "content": web_context_prompt})
+        add_message(messages, "user", web_context_prompt)
         
         print("\n\n🤖 Analyzing web content to find the answer...")
-        final_response = call_ollama_api_stream(messages, model)
+        final_response = call_ollama_api_stream(messages, model, use_context=True)
         if final_response:
-            messages.append({"role": "assistant", "content": final_response})
+            add_message(messages, "assistant", final_response)
             # We can even re-run handle_response in case the AI wants to do something
             # with the info (like save it to a file), but for now, we'll just print.
         return # Stop processing here
@@ -129,64 +353,113 @@ def handle_response(ai_response: str, messages: List[Dict], model: str):
 
     # (The rest of the file-saving logic remains the same)
     print(f"\n\n🤖 AI suggests a {language} program.")
-    # ... rest of the function is identical to the previous version ...
     if not filename: filename = generate_filename(code, language, model)
     try:
         dir_name = os.path.dirname(filename);
-        if dir_name: os.makedirs(dir_name, exist_ok=True)
+        if dir_name and dir_name not in _MKDIR_CACHE:
+            os.makedirs(dir_name, exist_ok=True); _MKDIR_CACHE.add(dir_name)
         with open(filename, "w") as f: f.write(code)
         print(f"\n✅ Code saved to {filename}")
     except Exception as e:
         print(f"\n❌ Error saving file: {e}"); return
-    run_messages = [{"role": "system", "content": "Provide ONLY the shell command to run the given file in the specified language."}, {"role": "user", "content": f"Command to run '{filename}' in {language}?"}]
-    print("\n🤖 Generating run command...", end=""); run_command_response = call_ollama_api_stream(run_messages, model=model, verbose=False); print(" Done.")
-    if not run_command_response: print("\n❌ Could not generate a run command."); return
-    _, _, run_command = extract_code_block(run_command_response)
-    if not run_command: run_command = run_command_response.strip().replace('`', '')
+    print("\n🤖 Generating run command...", end=""); run_command = generate_run_command(filename, language, model); print(" Done.")
+    if not run_command: print("\n❌ Could not generate a run command."); return
     execute_and_debug_command(run_command, messages, model, original_code=code, filename=filename, language=language)
 
-# (Other helper functions like execute_and_debug_command, generate_filename, etc. are unchanged)
+def run_command_streaming(command: str, tail_lines: int = 4096) -> subprocess.CompletedProcess:
+    """
+    Runs a shell command, echoing its output as it arrives and keeping only the
+    last lines of stdout/stderr. Raises CalledProcessError on a non-zero exit.
+    """
+    proc = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace", bufsize=1)
+    stdout_tail, stderr_tail = deque(maxlen=tail_lines), deque(maxlen=tail_lines)
+    def drain(stream, tail, out):
+        try:
+            for line in stream:
+                out.write(line); out.flush(); tail.append(line)
+        finally:
+            # Keep reading even if echoing failed, or the child blocks on a full pipe
+            for _ in stream: pass
+            stream.close()
+    drainers = [threading.Thread(target=drain, args=(proc.stdout, stdout_tail, sys.stdout), daemon=True),
+                threading.Thread(target=drain, args=(proc.stderr, stderr_tail, sys.stderr), daemon=True)]
+    for t in drainers: t.start()
+    proc.wait()
+    for t in drainers: t.join()
+    stdout, stderr = "".join(stdout_tail), "".join(stderr_tail)
+    if proc.returncode: raise subprocess.CalledProcessError(proc.returncode, command, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(command, proc.returncode, stdout, stderr)
+
 def execute_and_debug_command(command_to_run: str, messages: List[Dict], model: str, original_code: Optional[str] = None, filename: Optional[str] = None, language: Optional[str] = None):
-    # (Identical to previous version)
     current_command = command_to_run
     while True:
         confirm = input(f"\n👉 Execute: '{current_command}'? [y/N]: ").strip().lower()
         if confirm != 'y': break
         try:
             print("-" * 20 + " EXECUTION START " + "-" * 20)
-            result = subprocess.run(current_command, shell=True, check=True, capture_output=True, text=True)
-            print("\n✅ Success! Output:\n"); print(result.stdout)
-            messages.append({"role": "user", "content": f"Command `{current_command}` was successful. Output:\n```\n{result.stdout}\n```"})
+            result = run_command_streaming(current_command)
+            print("\n✅ Success!")
+            add_message(messages, "user", f"Command `{current_command}` was successful. Output:\n```\n{result.stdout}\n```")
             break
         except subprocess.CalledProcessError as e:
-            print(f"\n❌ Error: {e}\nStderr:\n{e.stderr}")
+            print(f"\n❌ Error: {e}") # Stderr was already shown live
             debug_confirm = input("\n🐛 Debug this error? [y/N]: ").strip().lower()
             if debug_confirm != 'y': break
             if filename and original_code: debug_prompt = f"Command `{current_command}` failed on `{filename}`. Error:\n```\n{e.stderr}\n```\nOriginal code:\n```{language}\n{original_code}\n```\nProvide a fix."
             else: debug_prompt = f"Command `{current_command}` failed. Error:\n```\n{e.stderr}\n```\nProvide the corrected command."
-            debug_messages = messages + [{"role": "user", "content": debug_prompt}]
-            print("\n🤖 AI is debugging..."); debug_response = call_ollama_api_stream(debug_messages, model);
-            if debug_response: messages.append({"role": "assistant", "content": debug_response}); handle_response(debug_response, messages, model)
+            messages.append({"role": "user", "content": debug_prompt}) # Borrow a slot instead of copying the history
+            print("\n🤖 AI is debugging...")
+            try: debug_response = call_ollama_api_stream(messages, model, use_context=True)
+            finally: messages.pop()
+            if debug_response: add_message(messages, "assistant", debug_response); handle_response(debug_response, messages, model)
             else: print("\n❌ No debug response.")
             break
         except Exception as e: print(f"\n❌ Unexpected error: {e}"); break
+def generate_run_command(filename: str, language: str, model: str) -> Optional[str]:
+    run_messages = [{"role": "system", "content": "Provide ONLY the shell command to run the given file in the specified language."}, {"role": "user", "content": f"Command to run '{filename}' in {language}?"}]
+    run_command_response = call_ollama_api_stream(run_messages, model=model, verbose=False)
+    if not run_command_response: return None
+    _, _, run_command = extract_code_block(run_command_response)
+    return run_command or run_command_response.strip().replace('`', '')
+
 def generate_filename(code: str, language: str, model: str) -> str:
-    # (Identical to previous version)
+    if language in _EXT:
+        clean_name = f"snippet_{hashlib.blake2b(code.encode(), digest_size=4).hexdigest()}.{_EXT[language]}"
+        print(f"\n\n🤖 Filename: {clean_name}"); return clean_name
     print("\n\n🤖 Generating filename..."); prompt=f"Suggest a concise, snake_case filename for this '{language}' code. Respond ONLY with the filename.\n\nCode:\n```\n{code}\n```"
     messages=[{"role":"user", "content":prompt}]; filename_response=call_ollama_api_stream(messages, model, verbose=False)
     if filename_response:
-        match=re.search(r'([\w_./-]+\.\w+)', filename_response)
+        match=_FNAME_SUGGEST_RE.search(filename_response)
         if match: clean_name=match.group(1).strip(); print(f"🤖 Filename: {clean_name}"); return clean_name
     fallback_name=f"generated_code_{int(time.time())}.{language or 'txt'}"; print(f"⚠️ Fallback: {fallback_name}"); return fallback_name
 
+def _load_cmd_history(path: str):
+    try: readline.read_history_file(path)
+    except FileNotFoundError: pass
+
+def _save_cmd_history(path: str, loader: threading.Thread):
+    loader.join() # Don't overwrite the file with a partially loaded history
+    readline.write_history_file(path)
+
+def _keep_model_warm(model: str, idle: threading.Event, interval: int = 240):
+    """Pings Ollama while the REPL waits for input, so the model stays loaded."""
+    data = _json_dumps({"model": model, "keep_alive": "10m"}) # No prompt: just load the model
+    session = requests.Session() # Own session: requests.Session isn't thread-safe and _SESSION streams chats
+    while True:
+        idle.wait()
+        try: session.post("http://localhost:11434/api/generate", data=data, headers={"Content-Type": "application/json"}, timeout=interval).close()
+        except requests.exceptions.RequestException: pass
+        time.sleep(interval)
+
 def main():
+    global _history_file
     parser = argparse.ArgumentParser(description="olacli: AI chat with web access and code execution.")
     parser.add_argument("--model", default="gemma3:latest", help="Ollama model to use.")
     # (Other arguments are the same)
     parser.add_argument("--prompt", help="One-shot prompt to send (non-interactive).")
     parser.add_argument("--image", help="Path to an image file for vision models.")
     parser.add_argument("--load-history", action="store_true", help="Load previous chat history.")
-    parser.add_argument("--save-history", action="store_true", help="Save chat history on exit.")
+    parser.add_argument("--save-history", action="store_true", help="Save chat history as you go.")
     args = parser.parse_args()
     
     # --- UPDATED SYSTEM PROMPT ---
@@ -202,34 +475,55 @@ def main():
     
     # The rest of main() is mostly the same, just initializing things
     CMD_HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".olacli_cmd_history")
-    if readline:
-        try: readline.read_history_file(CMD_HISTORY_FILE)
-        except FileNotFoundError: pass
+    if PromptSession:
+        session = PromptSession(history=FileHistory(os.path.join(os.path.expanduser("~"), ".olacli_prompt_history")))
+        read_prompt = lambda: session.prompt("\nYou: ")
+    else:
+        read_prompt = lambda: input("\nYou: ")
+    history_loader = None
+    if readline and not PromptSession:
+        # Load the history in the background while the greeting prints; save it on any exit
+        readline.set_history_length(1000)
+        history_loader = threading.Thread(target=_load_cmd_history, args=(CMD_HISTORY_FILE,), daemon=True)
+        history_loader.start()
+        atexit.register(_save_cmd_history, CMD_HISTORY_FILE, history_loader)
 
     print(f"\nWelcome to Ollama CLI! Using model: {args.model}")
     print("Now with web access! Try 'what is the price of Bitcoin?'")
     
     messages = [system_message]
-    if args.load_history: # ... load history logic ...
-        pass
+    if args.load_history:
+        history = load_history(CHAT_HISTORY_FILE, _MAX_HISTORY_MSGS - 1)
+        messages.extend(history); _trim_history(messages)
+        print(f"Loaded {len(history)} messages from {CHAT_HISTORY_FILE}")
+    if args.save_history:
+        _history_file = open(CHAT_HISTORY_FILE, "ab")
+        atexit.register(_history_file.close)
     
-    # Main loop (unchanged)
+    # Keep the model loaded while the user is typing
+    idle = threading.Event()
+    threading.Thread(target=_keep_model_warm, args=(args.model, idle), daemon=True).start()
+
+    # readline's history isn't thread-safe, so finish loading it before the first input()
+    if history_loader: history_loader.join()
+
+    # Main loop
     while True:
         try:
-            prompt = input("\nYou: ").strip()
+            idle.set()
+            try: prompt = read_prompt().strip()
+            finally: idle.clear()
             if prompt.lower() in ["exit", "quit"]:
-                if readline: readline.write_history_file(CMD_HISTORY_FILE)
                 break
             
-            messages.append({"role": "user", "content": prompt})
+            add_message(messages, "user", prompt)
 
             print("\nAI: ", end="")
-            ai_response = call_ollama_api_stream(messages, model=args.model)
+            ai_response = call_ollama_api_stream(messages, model=args.model, use_context=True)
             if ai_response:
-                messages.append({"role": "assistant", "content": ai_response})
+                add_message(messages, "assistant", ai_response)
                 handle_response(ai_response, messages, args.model)
         except (KeyboardInterrupt, EOFError):
-            if readline: readline.write_history_file(CMD_HISTORY_FILE)
             print("\nExiting...")
             break
 